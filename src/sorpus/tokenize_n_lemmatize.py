@@ -1,33 +1,79 @@
+import re
 from typing import List, Union, Tuple, Iterator
+from functools import lru_cache
+from operator import itemgetter
 
-try:
-    from nltk.stem import WordNetLemmatizer
-    from nltk import word_tokenize, pos_tag
-    from nltk.tag import StanfordNERTagger
-except ImportError:
-    raise ImportError(
-        "nltk is not installed. Please install it using 'pip install nltk'"
-    )
+_WN_TAG = {"J": "a", "N": "n", "R": "r", "V": "v"}.get
+
+
+def _pos2tag(pos: str) -> str:
+    """Convert POS tags to WordNet tags
+
+    :param pos: POS tag
+
+    :return: WordNet tag
+    """
+    return _WN_TAG(pos[0], "n")
 
-try:
-    from nltk.data import find
 
-    find("tokenizers/punkt")
-    find("taggers/averaged_perceptron_tagger")
-    find("corpora/wordnet")
-except LookupError:
-    import nltk
+_wnl = None
 
-    nltk.download("punkt")
-    nltk.download("averaged_perceptron_tagger")
-    nltk.download("wordnet")
+
+@lru_cache(maxsize=200_000)
+def _lemmatize_cached(word: str, pos: str) -> str:
+    """Lemmatize the word with WordNet, caching the results of repeated words
+
+    :param word: word to lemmatize
+    :param pos: WordNet tag
+
+    :return: lemmatized word
+    """
+    global _wnl
+    if _wnl is None:
+        from nltk.stem import WordNetLemmatizer
+
+        _wnl = WordNetLemmatizer()
+    return _wnl.lemmatize(word, pos=pos)
+
+
+# Lemmas of high-frequency closed-class words, looked up before WordNet:
+# modal verbs, determiners, pronouns, prepositions, conjunctions, and adverbs.
+# These are the words themselves whatever the POS tag, and skip WordNet quirks such as "as" -> "a" or "his" -> "hi".
+_FAST_LEMMA = {
+    word: word
+    for word in (
+        "can could will would shall should may might must "
+        "the a an this that these those he she it we they me him her us them "
+        "my your his its our their what which who whom whose "
+        "all any some each every both either neither no other such "
+        "of in on at by for with from to into onto about as than over under "
+        "after before between through during without within upon against among "
+        "and or but nor so yet if because while although though whether "
+        "not there here when where why how very also just only too then now"
+    ).split()
+}
+
+# Lemmas of auxiliary verbs, only used when the word is tagged as a verb
+# ("being" and "does" are also nouns)
+_FAST_VERB_LEMMA = {
+    **dict.fromkeys("am is are was were be been being".split(), "be"),
+    **dict.fromkeys("has have had".split(), "have"),
+    **dict.fromkeys("does do did".split(), "do"),
+}
 
 
 class TokenizerNLemmatizer:
     """
     Tokenizer And Lemmatizer
 
-    Tokenize and Lemmatize the text using Stanford NER and NLTK
+    Tokenize and Lemmatize the text using NER and NLTK
+
+    The NER backend used to check proper nouns can be chosen with `backend`:
+        - 'stanford': Stanford NER tagger (model_path and jar_path are required)
+        - 'corenlp': persistent CoreNLP server; connects to `url` if given,
+            otherwise starts a server from jar_path and model_path (the CoreNLP models jar)
+        - 'spacy': spaCy 'en_core_web_sm' pipeline, runs in-process;
+            tokenize, POS-tag, NER, and lemmatize are fused into a single spaCy pass without NLTK
 
     If you want to tokenize and lemmatize compound words containing spaces as single words,
     replace the spaces in those words with a specific character.
@@ -38,30 +84,286 @@ class TokenizerNLemmatizer:
             tokenize and lemmatizes the text
         - texts_lemmatizer(texts, space_token='•', return_pos=False)
             tokenize and lemmatizes the list of texts
+        - text_lemmatizer_soa(text, space_token='•')
+            tokenize and lemmatizes the text, returning words, POS tags, and lemmas as parallel lists
+        - texts_lemmatizer_soa(texts, space_token='•')
+            text_lemmatizer_soa for the list of texts
         - auto_lemmatizer(text, space_token='•', return_pos=False)
             autometically chooses the method based on input type
             if input type is List[str], multiprocesses the list of texts
+        - close()
+            stops the CoreNLP server started by this instance
+            the instance is also a context manager that calls close() on exit:
+
+    >>> with TokenizerNLemmatizer(model_path, jar_path, backend="corenlp") as lemmatizer:
+    ...     lemmatizer.text_lemmatizer("Proverbs are short sentences drawn from long experience.")
+    ['proverb', 'be', 'short', 'sentence', 'draw', 'from', 'long', 'experience', '.']
     """
 
-    def __init__(self, model_path: str, jar_path: str, encoding="utf8"):
-        try:
-            self.__st_ner = StanfordNERTagger(model_path, jar_path, encoding)
-        except LookupError:
-            raise LookupError(
-                "Stanford NER model not found.\nCheck paths or Download it from 'https://nlp.stanford.edu/software/CRF-NER.html'"
-                ""
+    __slots__ = (
+        "__backend",
+        "__server",
+        "__init_args",
+        "__ner_tag_sents",
+        "__nlp",
+        "__tokenize_words",
+        "__tag",
+        "__text_lemmatizer_cached",
+    )
+
+    def __init__(
+        self,
+        model_path: str = None,
+        jar_path: str = None,
+        encoding="utf8",
+        backend="stanford",
+        url: str = None,
+    ):
+        if backend not in ("stanford", "corenlp", "spacy"):
+            raise ValueError("backend should be one of 'stanford', 'corenlp', 'spacy'")
+
+        self.__backend = backend
+        self.__server = None
+        # arguments to build the same instance in worker processes
+        self.__init_args = (model_path, jar_path, encoding, backend, url)
+
+        # NLTK is imported here instead of at module load,
+        # so importing sorpus (and spawning worker processes) stays fast
+        if backend != "spacy":
+            try:
+                from nltk.tokenize import NLTKWordTokenizer
+                from nltk.tag.perceptron import PerceptronTagger
+                from nltk.tag import StanfordNERTagger
+            except ImportError:
+                raise ImportError(
+                    "nltk is not installed. Please install it using 'pip install nltk'"
+                )
+
+            try:
+                from nltk.data import find
+
+                find("taggers/averaged_perceptron_tagger")
+                find("corpora/wordnet")
+            except LookupError:
+                import nltk
+
+                nltk.download("averaged_perceptron_tagger")
+                nltk.download("wordnet")
+
+        if backend == "stanford":
+            try:
+                self.__ner_tag_sents = StanfordNERTagger(
+                    model_path, jar_path, encoding
+                ).tag_sents
+            except LookupError:
+                raise LookupError(
+                    "Stanford NER model not found.\nCheck paths or Download it from 'https://nlp.stanford.edu/software/CRF-NER.html'"
+                    ""
+                )
+        elif backend == "corenlp":
+            from nltk.parse.corenlp import CoreNLPServer, CoreNLPParser
+
+            # Start the server once and reuse it for every call
+            if url is None:
+                self.__server = CoreNLPServer(
+                    path_to_jar=jar_path, path_to_models_jar=model_path
+                )
+                self.__server.start()
+                url = self.__server.url
+                # workers connect to this server instead of starting their own
+                self.__init_args = (model_path, jar_path, encoding, backend, url)
+            self.__ner_tag_sents = CoreNLPParser(url=url, tagtype="ner").tag_sents
+        elif backend == "spacy":
+            try:
+                import spacy
+            except ImportError:
+                raise ImportError(
+                    "spacy is not installed. Please install it using 'pip install spacy'"
+                )
+
+            try:
+                self.__nlp = spacy.load("en_core_web_sm", disable=["parser"])
+            except OSError:
+                raise LookupError(
+                    "spaCy model not found.\nDownload it using 'python -m spacy download en_core_web_sm'"
+                )
+
+        if backend != "spacy":
+            # Load the tokenizer and tagger once, and warm up WordNet so the first call doesn't read the corpus
+            self.__tokenize_words = NLTKWordTokenizer().tokenize
+            self.__tag = PerceptronTagger().tag
+            _lemmatize_cached("test", "n")
+
+        # Cache the results of repeated sentences per instance
+        self.__text_lemmatizer_cached = lru_cache(maxsize=10_000)(
+            self._text_lemmatizer_impl
+        )
+
+    def close(self):
+        """Stop the CoreNLP server if it was started by this instance."""
+        if self.__server is not None:
+            self.__server.stop()
+            self.__server = None
+
+    def __reduce__(self):
+        # the per-instance cache can't be pickled, so rebuild the instance from its arguments
+        return (TokenizerNLemmatizer, self.__init_args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _batch_first_token_is_proper(
+        self, batch: List[List[str]], space_token="•"
+    ) -> List[bool]:
+        """Check if the first token of each sentence is a proper noun.
+        Only sentences starting with a capitalized noun are ambiguous and checked by NER;
+        the others are decided by the POS tag of the first token.
+        The ambiguous sentences are tagged with a single NER call, so the JVM is started (or the server is requested) only once for the batch.
+        Compound words are passed to NER as their separate words, so the first word of a compound is checked.
+
+        :param batch: list of tokenized sentences
+        :param space_token: character that replaced space instead in compound words
+
+        :return: list of whether the first token of each sentence is a proper noun
+        """
+        sentences, ambiguous = [], []
+        for words in batch:
+            first = words[0].split(space_token, 1)[0] if words else ""
+            check = (
+                first[:1].isupper()
+                and first != "I"
+                and self.__tag([first])[0][1].startswith("NN")
             )
+            if check:
+                # drop empty parts (e.g. a lone space_token), which NER would skip
+                sentences.append(
+                    [p for w in words for p in w.split(space_token) if p.strip()]
+                )
+            ambiguous.append(check)
 
-        self.__lemmatizer = WordNetLemmatizer()
+        tagged = iter(self.__ner_tag_sents(sentences) if sentences else [])
 
-    def __pos2tag(self, pos: str) -> str:
-        """Convert POS tags to WordNet tags
+        return [check and next(tagged)[0][1] != "O" for check in ambiguous]
 
-        :param pos: POS tag
+    def _lemmatize_words(
+        self, words: List[str], space_token="•"
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """POS-tag and lemmatize the tokens of a sentence.
+        Compound words are tagged and lemmatized by their last word, so the sentence is POS-tagged only once.
+        The space tokens in compound words are replaced with spaces.
+
+        :param words: tokens of the sentence
+        :param space_token: character that replaced space instead in compound words
 
-        :return: WordNet tag
+        :return: parallel lists of words, POS tags, and lemmatized words
         """
-        return pos[0].lower() if pos[0] in ["A", "N", "R", "V"] else "n"
+        # Split the last word of the compound words, keyed by the index of the compound word
+        heads = {}
+        last_words = list(words)
+        for j, word in enumerate(words):
+            if space_token in word:
+                head, _, last_words[j] = word.rpartition(space_token)
+                heads[j] = head.replace(space_token, " ")
+
+        # POS tagging
+        pos_tags = self.__tag(last_words)
+
+        # Lemmatize the words; closed-class words skip WordNet
+        # (functions are bound to locals so they are looked up only once)
+        tags = list(map(itemgetter(1), pos_tags))
+        fast_lemma = _FAST_LEMMA.get
+        fast_verb_lemma = _FAST_VERB_LEMMA.get
+        lemmatize = _lemmatize_cached
+        lemmas = [
+            fast_lemma(word)
+            or (pos == "v" and fast_verb_lemma(word))
+            or lemmatize(word, pos)
+            for word, pos in zip(last_words, map(_pos2tag, tags))
+        ]
+        if heads:
+            words = list(words)
+            for j, head in heads.items():
+                words[j] = head + " " + last_words[j]
+                lemmas[j] = head + " " + lemmas[j]
+
+        return words, tags, lemmas
+
+    def _spacy_make_doc(self, text: str, space_token="•"):
+        """Tokenize the sentence with spaCy, merging each compound word into a single token.
+        The punctuation around a compound word is split off with the tokenizer's own prefix and suffix rules.
+
+        :param text: input sentence
+        :param space_token: character that replaced space instead in compound words
+
+        :return: spaCy Doc of the sentence, not yet processed by the pipeline
+        """
+        tokenizer = self.__nlp.tokenizer
+        shift = len(space_token) - 1
+
+        doc = self.__nlp.make_doc(text.replace(space_token, " "))
+        with doc.retokenize() as retokenizer:
+            for chunk in re.finditer(r"\S+", text):
+                if space_token not in chunk.group():
+                    continue
+
+                start, end = chunk.span()
+                while True:
+                    m = tokenizer.prefix_search(text[start:end])
+                    if not m or not m.end() or space_token in m.group():
+                        break
+                    start += m.end()
+                while True:
+                    m = tokenizer.suffix_search(text[start:end])
+                    if not m or m.start() == m.end() or space_token in m.group():
+                        break
+                    end = start + m.start()
+
+                # offsets after replacing space_token with a space
+                span = doc.char_span(
+                    start - shift * text.count(space_token, 0, start),
+                    end - shift * text.count(space_token, 0, end),
+                    alignment_mode="expand",
+                )
+                if span is not None and len(span) > 1:
+                    retokenizer.merge(span)
+
+        return doc
+
+    def _spacy_texts_lemmatizer(
+        self, texts: List[str], space_token="•"
+    ) -> Iterator[Tuple[List[str], List[str], List[str]]]:
+        """Tokenize, POS-tag, NER, and lemmatize the texts in a single spaCy pipeline pass.
+        Compound words are merged into single tokens before tagging, and lemmatized by their last word.
+
+        :param texts: list of input sentences
+        :param space_token: character that replaced space instead in compound words
+
+        :return: Iterator of parallel lists of words, POS tags, and lemmatized words
+        """
+        docs = [self._spacy_make_doc(text, space_token) for text in texts]
+
+        for doc in self.__nlp.pipe(docs, batch_size=256):
+            words = [token.text for token in doc]
+            tags = [token.tag_ for token in doc]
+            lemmas = [token.lemma_ for token in doc]
+            for j, word in enumerate(words):
+                if " " in word:
+                    # keep the other words of the compound word as they are
+                    lemmas[j] = (
+                        word.rpartition(" ")[0] + " " + lemmas[j].rpartition(" ")[2]
+                    )
+
+            # Lower the words
+            if (
+                words and doc[0].ent_type_ == "" and doc[0].text != "I"
+            ):  # If first word is not proper noun
+                words[0] = words[0].lower()
+                lemmas[0] = lemmas[0].lower()
+
+            yield words, tags, lemmas
 
     def text_lemmatizer(
         self, text: str, space_token="•", return_pos=False
@@ -69,6 +371,8 @@ class TokenizerNLemmatizer:
         """this method conduct Tokenize, POS-tag, and lemmatize the input sentence and return the processed tokens.
         Specifically, check if the first token of the sentence is a proper noun or 'I', and if so, retain its capitalization; otherwise, convert it to lowercase.
         Additionally, replace the space tokens in compound words with spaces and lemmatize plural forms to their singular forms.
+        A compound word is lemmatized by its last word, and its POS tag is the tag of that last word as it appears in the sentence
+        (e.g. 'NNS' for "police•officers").
 
         :param text: input sentence
         :param space_token: character that replaced space instead in compound words
@@ -89,54 +393,26 @@ class TokenizerNLemmatizer:
         >>> print(lemmatizer.text_lemmatizer(replaced_text, space_token='•'))
         ['in', 'New York', ',', 'I', 'saw', 'police officer', 'and', 'firefighter', '.']
         """
-        # Tokenize the sentence
-        words = word_tokenize(text)
-
-        # replace space_token to space
-        new_words = []
-        for j, word in enumerate(words):
-            if space_token in word:
-                compounds = word.split(space_token)
-                # lemmaitze for last word of the compound word
-                last_compound_pos = pos_tag([compounds[-1]])
-                compounds[-1] = self.__lemmatizer.lemmatize(
-                    compounds[-1], pos=self.__pos2tag(last_compound_pos[0][1])
-                )
-                new_words.append(" ".join(compounds))
-            else:
-                new_words.append(word)
-        words = new_words
+        return list(self.__text_lemmatizer_cached(text, space_token, return_pos))
 
-        # Lower the words
-        if (
-            self.__st_ner.tag(words)[0][1] == "O" and words[0] != "I"
-        ):  # If first word is not proper noun
-            words[0] = words[0].lower()
+    def _text_lemmatizer_impl(
+        self, text: str, space_token="•", return_pos=False
+    ) -> Union[Tuple[str, ...], Tuple[Tuple[str, str], ...]]:
+        """Lemmatize the input sentence, returning a tuple so the result can be cached.
 
-        # POS tagging
-        pos_tags = pos_tag(words)
-
-        # Lemmatize the words
-        if return_pos:
-            return [
-                (
-                    self.__lemmatizer.lemmatize(
-                        word, pos=self.__pos2tag(pos_tags[i][1])
-                    ),
-                    pos_tags[i][1],
-                )
-                for i, word in enumerate(words)
-            ]
+        :param text: input sentence
+        :param space_token: character that replaced space instead in compound words
+        :param return_pos: if True, return POS tags along with lemmatized words
 
-        return [
-            self.__lemmatizer.lemmatize(word, pos=self.__pos2tag(pos_tags[i][1]))
-            for i, word in enumerate(words)
-        ]
+        :return: lemmatized words or lemmatized words with POS tags
+        """
+        return tuple(next(self.texts_lemmatizer([text], space_token, return_pos)))
 
     def texts_lemmatizer(
         self, texts: List[str], space_token="•", return_pos=False
     ) -> Iterator[Union[List[str], List[Tuple[str, str]]]]:
-        """this method yeilds text_lemmatizer for each text in the list of texts.
+        """this method yeilds lemmatized tokens for each text in the list of texts.
+        Sentences starting with a capitalized noun are checked by NER in a single call.
         Conduct Tokenize, POS-tag, and lemmatize the input sentences and return the processed tokens.
         Specifically, check if the first token of the sentence is a proper noun or 'I', and if so, retain its capitalization; otherwise, convert it to lowercase.
         Additionally, replace the space tokens in compound words with spaces and lemmatize plural forms to their singular forms.
@@ -153,31 +429,138 @@ class TokenizerNLemmatizer:
         >>> list(lemmatizer.texts_lemmatizer(texts, space_token='•'))
         [['proverb', 'be', 'short', 'sentence', 'draw', 'from', 'long', 'experience', '.'], ['in', 'New York', ',', 'I', 'saw', 'police officer', 'and', 'firefighter', '.']]
         """
-        yield from (
-            self.text_lemmatizer(text, space_token, return_pos) for text in texts
-        )
+        for words, tags, lemmas in self.texts_lemmatizer_soa(texts, space_token):
+            if return_pos:
+                yield list(zip(lemmas, tags))
+            else:
+                yield lemmas
+
+    def text_lemmatizer_soa(
+        self, text: str, space_token="•"
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """this method conduct Tokenize, POS-tag, and lemmatize the input sentence
+        and return the words, POS tags, and lemmatized words as parallel lists.
+
+        :param text: input sentence
+        :param space_token: character that replaced space instead in compound words
+
+        :return: parallel lists of words, POS tags, and lemmatized words
+
+        >>> lemmatizer = TokenizeNLemmatize(model_path, jar_path)
+        >>> lemmatizer.text_lemmatizer_soa("In New•York, I saw police•officers.")
+        (['in', 'New York', ',', 'I', 'saw', 'police officers', '.'], ['IN', 'NNP', ',', 'PRP', 'VBD', 'NNS', '.'], ['in', 'New York', ',', 'I', 'see', 'police officer', '.'])
+        """
+        return next(self.texts_lemmatizer_soa([text], space_token))
+
+    def texts_lemmatizer_soa(
+        self, texts: List[str], space_token="•"
+    ) -> Iterator[Tuple[List[str], List[str], List[str]]]:
+        """this method yeilds the words, POS tags, and lemmatized words as parallel lists for each text in the list of texts.
+        With the NLTK backends, sentences starting with a capitalized noun are checked by NER in a single call.
+
+        :param texts: list of input sentences
+        :param space_token: character that replaced space instead in compound words
+
+        :return: Iterator of parallel lists of words, POS tags, and lemmatized words
+        """
+        if self.__backend == "spacy":
+            yield from self._spacy_texts_lemmatizer(texts, space_token)
+            return
+
+        # Tokenize all sentences first, so NER can tag them in a single call.
+        # Compound words stay joined by space_token until they are lemmatized.
+        # (input is a single sentence, so sentence splitting is skipped)
+        all_words = [self.__tokenize_words(text) for text in texts]
+        first_is_proper = self._batch_first_token_is_proper(all_words, space_token)
+
+        for words, is_proper in zip(all_words, first_is_proper):
+            # Lower the words
+            if (
+                words and not is_proper and words[0] != "I"
+            ):  # If first word is not proper noun
+                words[0] = words[0].lower()
+
+            yield self._lemmatize_words(words, space_token)
 
     def auto_lemmatizer(
         self, text: Union[str, List[str]], space_token="•", return_pos=False
-    ):
+    ) -> Union[
+        List[str],
+        List[Tuple[str, str]],
+        Iterator[Union[List[str], List[Tuple[str, str]]]],
+    ]:
         """this method autometically chooses the method based on input type.
-        If input type is List[str], multiprocesses the list of texts.
+        If input type is str, returns the lemmatized words directly.
+        If input type is List[str], multiprocesses the list of texts and returns an iterator.
 
         :param text: input sentence or list of input sentences
         :param space_token: character that replaced space instead in compound words
         :param return_pos: if True, return POS tags along with lemmatized words
 
-        :return: lemmatized words or lemmatized words with POS tags
+        :return: lemmatized words or lemmatized words with POS tags,
+            or Iterator of them if input type is List[str]
         """
         if isinstance(text, str):
             return self.text_lemmatizer(text, space_token, return_pos)
         elif isinstance(text, list):
-            import multiprocessing
-
-            with multiprocessing.Pool() as pool:
-                yield from pool.imap(self.text_lemmatizer, text)
+            return self._iter_pool(text, space_token, return_pos)
         else:
             raise TypeError("Input should be either string or list of strings")
 
+    def _iter_pool(
+        self, texts: List[str], space_token="•", return_pos=False
+    ) -> Iterator[Union[List[str], List[Tuple[str, str]]]]:
+        """Multiprocess the list of texts and yield the results in order.
+        Each worker process builds its own tokenizer once, and the texts are sent to workers in chunks
+        so that each chunk is checked by NER in a single call.
+        The pool is closed when the iterator is exhausted or closed.
+
+        :param texts: list of input sentences
+        :param space_token: character that replaced space instead in compound words
+        :param return_pos: if True, return POS tags along with lemmatized words
+
+        :return: Iterator of lemmatized words or lemmatized words with POS tags
+        """
+        import multiprocessing
+        from functools import partial
+
+        chunksize = max(1, len(texts) // (multiprocessing.cpu_count() * 4))
+        chunks = [texts[i : i + chunksize] for i in range(0, len(texts), chunksize)]
+        worker = partial(
+            _worker_lemmatize, space_token=space_token, return_pos=return_pos
+        )
+
+        with multiprocessing.Pool(
+            initializer=_init_worker, initargs=self.__init_args
+        ) as pool:
+            for lemmatized in pool.imap(worker, chunks):
+                yield from lemmatized
+
     def __repr__(self) -> str:
         return "<TokenizeNLemmatize>"
+
+
+_WORKER_TOKENIZER = None
+
+
+def _init_worker(*args):
+    """Build the tokenizer once per worker process
+
+    :param args: arguments of TokenizerNLemmatizer
+    """
+    global _WORKER_TOKENIZER
+    _WORKER_TOKENIZER = TokenizerNLemmatizer(*args)
+
+
+def _worker_lemmatize(
+    texts: List[str], space_token="•", return_pos=False
+) -> List[Union[List[str], List[Tuple[str, str]]]]:
+    """Lemmatize a chunk of texts with the tokenizer of the worker process
+
+    :param texts: chunk of input sentences
+    :param space_token: character that replaced space instead in compound words
+    :param return_pos: if True, return POS tags along with lemmatized words
+
+    :return: list of lemmatized words or lemmatized words with POS tags
+    """
+    return list(_WORKER_TOKENIZER.texts_lemmatizer(texts, space_token, return_pos))
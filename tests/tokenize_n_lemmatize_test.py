@@ -1,8 +1,14 @@
 import pytest
 import os
+import pickle
 import nltk
 
-from src.sorpus.tokenize_n_lemmatize import TokenizerNLemmatizer
+from src.sorpus.tokenize_n_lemmatize import (
+    TokenizerNLemmatizer,
+    _FAST_LEMMA,
+    _FAST_VERB_LEMMA,
+    _pos2tag,
+)
 
 
 def test_text_lemmatizer():
@@ -43,7 +49,7 @@ def test_text_lemmatizer():
         (",", ","),
         ("I", "PRP"),
         ("see", "VBP"),
-        ("police officer", "NN"),
+        ("police officer", "NNS"),
         ("and", "CC"),
         ("firefighter", "NN"),
         (".", "."),
@@ -63,4 +69,257 @@ def test_text_lemmatizer():
     ]
 
 
+def test_text_lemmatizer_soa():
+    tomatizer = _stanford_tokenizer()
+
+    words, tags, lemmas = tomatizer.text_lemmatizer_soa(
+        "In New•York, I saw police•officers and firefighters.", space_token="•"
+    )
+
+    assert words == [
+        "in",
+        "New York",
+        ",",
+        "I",
+        "saw",
+        "police officers",
+        "and",
+        "firefighters",
+        ".",
+    ]
+    assert tags == ["IN", "NNP", ",", "PRP", "VBP", "NNS", "CC", "NN", "."]
+    assert lemmas == [
+        "in",
+        "New York",
+        ",",
+        "I",
+        "see",
+        "police officer",
+        "and",
+        "firefighter",
+        ".",
+    ]
+
+
+def _stanford_tokenizer():
+    source_directory = os.path.dirname(os.path.abspath(__file__))
+    stanford_path = os.path.join(source_directory, "stanford")
+
+    return TokenizerNLemmatizer(
+        model_path=os.path.join(stanford_path, "english.muc.7class.distsim.crf.ser.gz"),
+        jar_path=os.path.join(stanford_path, "stanford-ner-4.2.0.jar"),
+    )
+
+
+def _stub_tag_sents(calls, entities=("New", "York")):
+    # Like StanfordNERTagger, split the joined tokens by whitespace,
+    # then re-slice the flat output by the length of each sentence
+    def tag_sents(sentences):
+        calls.append([list(words) for words in sentences])
+        flat = [
+            (word, "LOCATION" if word in entities else "O")
+            for words in sentences
+            for token in words
+            for word in token.split()
+        ]
+        tagged, i = [], 0
+        for words in sentences:
+            tagged.append(flat[i : i + len(words)])
+            i += len(words)
+        return tagged
+
+    return tag_sents
+
+
+def test_texts_lemmatizer_batched_ner_with_compounds():
+    tomatizer = _stanford_tokenizer()
+    calls = []
+    tomatizer._TokenizerNLemmatizer__ner_tag_sents = _stub_tag_sents(calls)
+
+    # compounds in earlier sentences must not shift the NER tags of later ones
+    results = list(
+        tomatizer.texts_lemmatizer(
+            ["Police•officers saw it.", "Fire•fighters saw it.", "New•York is big."],
+            space_token="•",
+        )
+    )
+
+    assert [lemmas[0] for lemmas in results] == [
+        "police officer",
+        "fire fighter",
+        "New York",
+    ]
+    assert len(calls) == 1
+    assert ["New", "York", "is", "big", "."] in calls[0]
+
+
+def test_texts_lemmatizer_batched_ner_with_lone_space_token():
+    tomatizer = _stanford_tokenizer()
+    calls = []
+    tomatizer._TokenizerNLemmatizer__ner_tag_sents = _stub_tag_sents(
+        calls, entities=("Paris", "London", "York")
+    )
+    texts = ["Paris • London are cities .", "Apples are red .", "York is old ."]
+
+    # a lone space_token must not shift the NER tags of later sentences
+    batched = list(tomatizer.texts_lemmatizer_soa(texts, space_token="•"))
+
+    assert batched == [
+        tomatizer.text_lemmatizer_soa(text, space_token="•") for text in texts
+    ]
+    assert batched[2][0][0] == "York"
+
+
+def _spacy_blank_tokenizer():
+    spacy = pytest.importorskip("spacy")
+
+    # a blank pipeline only tokenizes, so no model download is needed
+    tomatizer = object.__new__(TokenizerNLemmatizer)
+    tomatizer._TokenizerNLemmatizer__backend = "spacy"
+    tomatizer._TokenizerNLemmatizer__nlp = spacy.blank("en")
+    return tomatizer
+
+
+def test_spacy_make_doc_merges_compounds():
+    tomatizer = _spacy_blank_tokenizer()
+
+    def tokens(text, space_token="•"):
+        return [
+            token.text
+            for token in tomatizer._spacy_make_doc(text, space_token=space_token)
+        ]
+
+    assert tokens("In New•York, I saw police•officers.") == [
+        "In",
+        "New York",
+        ",",
+        "I",
+        "saw",
+        "police officers",
+        ".",
+    ]
+    assert tokens('"police•officers"') == ['"', "police officers", '"']
+    assert tokens("state-of-the-art•design, ok") == [
+        "state-of-the-art design",
+        ",",
+        "ok",
+    ]
+    assert tokens("(New<sp>York<sp>City) x", space_token="<sp>") == [
+        "(",
+        "New York City",
+        ")",
+        "x",
+    ]
+
+
+def test_spacy_texts_lemmatizer_soa_words():
+    tomatizer = _spacy_blank_tokenizer()
+
+    results = list(
+        tomatizer.texts_lemmatizer_soa(
+            ["In New•York, I saw police•officers.", "state-of-the-art•design, ok"],
+            space_token="•",
+        )
+    )
+
+    assert [words for words, _, _ in results] == [
+        ["in", "New York", ",", "I", "saw", "police officers", "."],
+        ["state-of-the-art design", ",", "ok"],
+    ]
+    assert all(
+        len(words) == len(tags) == len(lemmas) for words, tags, lemmas in results
+    )
+
+
+def test_pickle_round_trip():
+    tomatizer = _stanford_tokenizer()
+    text = "In New•York, I saw police•officers and firefighters."
+
+    restored = pickle.loads(pickle.dumps(tomatizer))
+
+    assert isinstance(restored, TokenizerNLemmatizer)
+    assert restored.text_lemmatizer(text) == tomatizer.text_lemmatizer(text)
+
+
+def test_auto_lemmatizer_str_returns_list():
+    tomatizer = _stanford_tokenizer()
+    text = "In New•York, I saw police•officers and firefighters."
+
+    lemmatized = tomatizer.auto_lemmatizer(text, space_token="•", return_pos=True)
+
+    assert isinstance(lemmatized, list)
+    assert lemmatized == tomatizer.text_lemmatizer(
+        text, space_token="•", return_pos=True
+    )
+
+
+def test_auto_lemmatizer_list_keeps_order():
+    tomatizer = _stanford_tokenizer()
+    texts = [
+        "Proverbs are short sentences drawn from long experience.",
+        "In New•York, I saw police•officers and firefighters.",
+        "Naked I came into the world, and naked I must go out.",
+    ] * 3
+
+    assert list(tomatizer.auto_lemmatizer(texts, space_token="•")) == [
+        tomatizer.text_lemmatizer(text, space_token="•") for text in texts
+    ]
+
+
+def test_texts_lemmatizer_soa_batched_ner():
+    tomatizer = _stanford_tokenizer()
+    calls = []
+    tomatizer._TokenizerNLemmatizer__ner_tag_sents = _stub_tag_sents(calls)
+
+    results = list(
+        tomatizer.texts_lemmatizer_soa(
+            [
+                "In New•York, I saw police•officers.",
+                "New•York is big.",
+                "Proverbs are short.",
+            ],
+            space_token="•",
+        )
+    )
+
+    assert [words for words, _, _ in results] == [
+        ["in", "New York", ",", "I", "saw", "police officers", "."],
+        ["New York", "is", "big", "."],
+        ["proverbs", "are", "short", "."],
+    ]
+    assert all(
+        len(words) == len(tags) == len(lemmas) for words, tags, lemmas in results
+    )
+    assert [lemmas[0] for _, _, lemmas in results] == ["in", "New York", "proverb"]
+    # all sentences that need NER are tagged in a single call
+    assert len(calls) == 1
+    assert ["New", "York", "is", "big", "."] in calls[0]
+
+
+def test_pos2tag():
+    assert [_pos2tag(tag) for tag in ["JJ", "NNS", "RB", "VBD", "IN", "PRP", "."]] == [
+        "a",
+        "n",
+        "r",
+        "v",
+        "n",
+        "n",
+        "n",
+    ]
+
+
+def test_fast_lemma():
+    # closed-class words are their own lemmas whatever the POS tag
+    assert all(word == lemma for word, lemma in _FAST_LEMMA.items())
+    assert _FAST_LEMMA["as"] == "as"
+    assert _FAST_LEMMA["his"] == "his"
+    # POS-ambiguous verb forms are only in the verb table
+    assert "being" not in _FAST_LEMMA
+    assert "does" not in _FAST_LEMMA
+    assert _FAST_VERB_LEMMA["being"] == "be"
+    assert _FAST_VERB_LEMMA["was"] == "be"
+    assert _FAST_VERB_LEMMA["has"] == "have"
+    assert _FAST_VERB_LEMMA["does"] == "do"
+
+
 # def test_texts_lemmatizer():